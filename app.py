@@ -4,13 +4,21 @@ Minimal, fast-loading version for production deployment
 """
 import streamlit as st
 import pandas as pd
+import pyarrow as pa
 import plotly.graph_objects as go
-import plotly.express as px
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, wait
+import hashlib
+import io
 import sys
 
-# Add src to path
-sys.path.append(str(Path(__file__).parent))
+# Add src to path (once; the script is re-executed on every rerun)
+APP_ROOT = str(Path(__file__).parent)
+if APP_ROOT not in sys.path:
+    sys.path.append(APP_ROOT)
+
+from src.data_ingestion.csv_parser import detect_delimiter, read_csv_arrow
+from src.visualization.downsampling import downsample_line
 
 # Page configuration
 st.set_page_config(
@@ -20,43 +28,38 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Custom CSS for dark theme
-st.markdown("""
-<style>
-    .stApp {
-        background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
-        color: #ffffff;
-    }
-    
-    .main-header {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 2rem;
-        border-radius: 15px;
-        margin-bottom: 2rem;
-        text-align: center;
-        box-shadow: 0 8px 32px rgba(0,0,0,0.3);
-    }
-    
-    .chat-message {
-        padding: 1rem;
-        margin: 1rem 0;
-        border-radius: 10px;
-        box-shadow: 0 4px 16px rgba(0,0,0,0.2);
-    }
-    
-    .user-message {
-        background: linear-gradient(135deg, #00c853 0%, #00e676 100%);
-        color: #1a1a1a;
-        margin-left: 2rem;
-    }
-    
-    .assistant-message {
-        background: linear-gradient(135deg, #2196F3 0%, #64b5f6 100%);
-        color: #1a1a1a;
-        margin-right: 2rem;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Static page chrome (dark theme CSS + header), built once per server process
+HEADER_HTML = """
+<div class="main-header">
+    <h1 style='color: white; margin: 0;'> AI Analytics Intelligence System</h1>
+    <p style='color: #e0e0e0; margin: 0.5rem 0 0 0;'>
+        OpenAI GPT-4 Powered with Intelligent Fallback
+    </p>
+</div>
+"""
+
+WELCOME_HTML = """
+<div style='background: rgba(255,255,255,0.1); padding: 3rem; border-radius: 15px; text-align: center;'>
+    <h2 style='color: white;'> Welcome!</h2>
+    <p style='color: #e0e0e0; font-size: 1.2rem;'>
+        Upload a CSV file to get started with AI-powered analytics!
+    </p>
+    <br>
+    <p style='color: #b0b0b0;'>
+         Use the sidebar to upload your data
+    </p>
+</div>
+"""
+
+
+@st.cache_resource
+def page_chrome() -> str:
+    """Read the dashboard stylesheet once and return it with the header as one HTML block"""
+    css = (Path(__file__).parent / "static" / "dashboard.css").read_text()
+    return f"<style>\n{css}</style>\n{HEADER_HTML}"
+
+
+st.markdown(page_chrome(), unsafe_allow_html=True)
 
 # Initialize session state
 if 'messages' not in st.session_state:
@@ -67,16 +70,223 @@ if 'agent_loaded' not in st.session_state:
     st.session_state.agent_loaded = False
 if 'agent' not in st.session_state:
     st.session_state.agent = None
+if 'loaded_fp' not in st.session_state:
+    st.session_state.loaded_fp = None
+if 'upload_id' not in st.session_state:
+    st.session_state.upload_id = None
+if 'prewarm' not in st.session_state:
+    st.session_state.prewarm = {}
+
+# Quick Actions buttons: (label, key, text shown in the chat, prompt sent to the agent).
+# With the rule-based fallback, the prompts are answered in the background after upload.
+QUICK_ACTIONS = (
+    (" Show Summary", "btn_summary", "Give me a summary", "Give me a summary of the data"),
+    (" Top Items", "btn_top", "Show top 5 items", "Show me the top 5 items"),
+    (" Trends", "btn_trends", "Show trends", "Show me trends in the data"),
+)
+
+# Number of most recent chat charts rendered without being asked for
+EAGER_CHARTS = 3
+
+
+def prewarm_quick_actions(agent):
+    """Start answering the Quick Actions prompts against the freshly loaded data"""
+    settle_prewarm()
+    # Only rule-based answers are precomputed; LLM calls are slow, may be billed and wait for a click
+    if agent.openai_available or agent.ollama_available:
+        return
+    executor = ThreadPoolExecutor(max_workers=2)
+    st.session_state.prewarm = {prompt: executor.submit(agent.ask, prompt) for *_, prompt in QUICK_ACTIONS}
+    # The session's workers exit once these answers are done
+    executor.shutdown(wait=False)
+
+
+def settle_prewarm():
+    """Cancel queued Quick Actions answers and wait for running ones, so the agent is idle before new data"""
+    futures = list(st.session_state.prewarm.values())
+    for future in futures:
+        future.cancel()
+    wait(futures)
+    st.session_state.prewarm = {}
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def read_csv_bytes(_data: bytes, digest: str, delimiter: str = ',') -> pd.DataFrame:
+    """Parse an uploaded CSV with Arrow's multithreaded reader, falling back to pandas (cached on `digest`)"""
+    try:
+        return read_csv_arrow(_data, delimiter=delimiter)
+    except pa.ArrowInvalid:
+        return pd.read_csv(io.BytesIO(_data), sep=delimiter)
+
+
+def sniff_upload(data: bytes) -> str:
+    """Delimiter of an uploaded CSV, checked from its first 4 KB before any parsing"""
+    head = data[:4096]
+    if b'\x00' in head:
+        raise ValueError("This file does not look like a CSV (it contains binary data)")
+    return detect_delimiter(head)
+
+
+def upload_digest(data: bytes) -> str:
+    """Content key for an upload, hashed in one pass over the buffer without copying it"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# Line charts longer than this are drawn with WebGL instead of SVG (plotly.express's "auto" cut-off)
+WEBGL_POINTS = 1000
+
+# Plotly trace for each chart type the agent returns, built from the payload's x/y
+TRACE_BUILDERS = {
+    'bar': lambda x, y: go.Bar(x=x, y=y),
+    'line': lambda x, y: (go.Scattergl if len(x) > WEBGL_POINTS else go.Scatter)(x=x, y=y, mode='lines'),
+    'pie': lambda x, y: go.Pie(labels=x, values=y),
+}
+
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def _chart_figure(chart_type: str, title: str, x: tuple, y: tuple):
+    """Plotly figure for one chart payload; identical payloads share the figure"""
+    if chart_type == 'line':
+        x, y = downsample_line(x, y)
+    fig = go.Figure(data=[TRACE_BUILDERS[chart_type](x, y)])
+    # uirevision keeps the user's zoom/pan when the chart is redrawn on a rerun
+    fig.update_layout(template='plotly_dark', height=400, title=title, uirevision=title)
+    return fig
+
+
+def build_chart(chart_data):
+    """Build the Plotly figure for an assistant message's chart data (None if not chartable)"""
+    try:
+        if chart_data and chart_data.get('type') in TRACE_BUILDERS and 'x' in chart_data and 'y' in chart_data:
+            return _chart_figure(chart_data['type'], chart_data.get('title', ''),
+                                 tuple(chart_data['x']), tuple(chart_data['y']))
+    except Exception:
+        pass
+    return None
+
+
+def prewarmed_answer(prompt: str):
+    """Future of a precomputed answer that is running or done (None when there is none)"""
+    future = st.session_state.prewarm.get(prompt)
+    # A precomputed answer that has not started yet is no faster than asking now
+    if future is not None and not future.cancel():
+        return future
+    return None
+
+
+def ask_agent(prompt: str):
+    """Ask the agent, reusing a precomputed answer when one is available"""
+    future = prewarmed_answer(prompt)
+    if future is not None:
+        return future.result()
+    return st.session_state.agent.ask(prompt)
+
+
+def run_all_quick_actions():
+    """Ask every Quick Actions prompt at once and add the answers to the chat history in order"""
+    agent = st.session_state.agent
+    # Each LLM answer is a separate network round trip, so the prompts are sent concurrently
+    with ThreadPoolExecutor(max_workers=len(QUICK_ACTIONS)) as executor:
+        futures = [prewarmed_answer(prompt) or executor.submit(agent.ask, prompt) for *_, prompt in QUICK_ACTIONS]
+        for (_, _, shown, _), future in zip(QUICK_ACTIONS, futures):
+            st.session_state.messages.append({"role": "user", "content": shown})
+            add_answer(future.result())
+
+
+def run_quick_action(shown: str, prompt: str):
+    """Add a Quick Actions question and its (usually precomputed) answer to the chat history"""
+    st.session_state.messages.append({"role": "user", "content": shown})
+    add_answer(ask_agent(prompt))
+
+
+def stream_answer(prompt: str, response: dict):
+    """Yield the agent's answer text as it arrives; the full response is stored in `response`"""
+    for item in st.session_state.agent.ask_stream(prompt):
+        if isinstance(item, dict):
+            response.update(item)
+        else:
+            yield item
+
+
+def add_answer(response):
+    """Append the agent's answer (and its chart, if any) to the chat history"""
+    ai_message = {"role": "assistant", "content": response.get('answer', 'No response')}
+    if response.get('chart_data'):
+        ai_message['figure'] = build_chart(response['chart_data'])
+    st.session_state.messages.append(ai_message)
+
+
+@st.fragment
+def chat_panel():
+    """Chat history, input and quick actions; reruns on its own when a message is added"""
+    # Display chat history
+    st.subheader(" AI Analytics Assistant")
+    
+    messages = st.session_state.messages
+    
+    # Only the most recent charts are sent eagerly; older ones are serialized on demand
+    chart_idx = [idx for idx, message in enumerate(messages) if message.get("figure") is not None]
+    eager_charts = set(chart_idx[-EAGER_CHARTS:])
+    
+    for idx, message in enumerate(messages):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+            
+            # Display chart if exists (figure is built once, when the message is added)
+            if message.get("figure") is not None:
+                if idx in eager_charts or st.toggle(" Show chart", key=f"show_chart_{idx}"):
+                    st.plotly_chart(message["figure"], key=f"chart_{idx}")
+    
+    # Chat input
+    with st.form("chat_form", clear_on_submit=True):
+        user_input = st.text_input(
+            "Ask a question about your data...",
+            placeholder="e.g., What is the total revenue?",
+            key="chat_input"
+        )
+        send_pressed = st.form_submit_button(" Send")
+        
+        if send_pressed and user_input and st.session_state.agent:
+            # Add user message
+            st.session_state.messages.append({"role": "user", "content": user_input})
+            
+            # Get AI response, showing the text as it is generated
+            try:
+                response = {}
+                with st.chat_message("assistant"):
+                    st.write_stream(stream_answer(user_input, response))
+                add_answer(response)
+                st.rerun(scope="fragment")
+                    
+            except Exception as e:
+                st.error(f" Error: {str(e)}")
+    
+    # Quick actions
+    st.markdown("---")
+    st.subheader(" Quick Actions")
+    
+    for col, (label, key, shown, prompt) in zip(st.columns(len(QUICK_ACTIONS)), QUICK_ACTIONS):
+        with col:
+            if st.button(label, key=key):
+                try:
+                    run_quick_action(shown, prompt)
+                    st.rerun(scope="fragment")
+                except Exception as e:
+                    st.error(f"Error: {str(e)}")
+    
+    # All Quick Actions at once (answered in the background after upload when the fallback is active)
+    if st.button(" Run All Quick Actions", key="btn_run_all"):
+        try:
+            run_all_quick_actions()
+            st.rerun(scope="fragment")
+        except Exception as e:
+            st.error(f"Error: {str(e)}")
+    
+    # Clear chat button
+    if st.button(" Clear Chat", key="btn_clear_chat"):
+        st.session_state.messages = []
+        st.rerun(scope="fragment")
 
-# Header
-st.markdown("""
-<div class="main-header">
-    <h1 style='color: white; margin: 0;'> AI Analytics Intelligence System</h1>
-    <p style='color: #e0e0e0; margin: 0.5rem 0 0 0;'>
-        OpenAI GPT-4 Powered with Intelligent Fallback
-    </p>
-</div>
-""", unsafe_allow_html=True)
 
 # Sidebar - File Upload
 with st.sidebar:
@@ -90,21 +300,37 @@ with st.sidebar:
     
     if uploaded_file is not None:
         try:
-            df = pd.read_csv(uploaded_file)
-            st.session_state.uploaded_data = df
-            st.success(f" Loaded: {uploaded_file.name}")
-            st.info(f" {len(df)} rows × {len(df.columns)} columns")
+            # Parse and fingerprint each upload once; later reruns reuse the session state
+            if uploaded_file.file_id != st.session_state.upload_id:
+                data = uploaded_file.getvalue()
+                fp = upload_digest(data)
+                df = read_csv_bytes(data, fp, sniff_upload(data))
+                
+                # Only hand the data to the agent when the uploaded content actually changed
+                if fp != st.session_state.loaded_fp:
+                    st.session_state.uploaded_data = df
+                    st.session_state.loaded_fp = fp
+                    st.session_state.data_preview = df.head(5).copy()
+                    st.session_state.n_rows, st.session_state.n_cols = df.shape
+                    if st.session_state.agent is not None:
+                        settle_prewarm()
+                        st.session_state.agent.load_data(df)
+                        prewarm_quick_actions(st.session_state.agent)
+                st.session_state.upload_id = uploaded_file.file_id
+            
+            st.success(f" Loaded: {uploaded_file.name}  \n {st.session_state.n_rows:,} rows × {st.session_state.n_cols} columns")
             
             with st.expander(" Preview Data"):
-                st.dataframe(df.head())
+                st.dataframe(st.session_state.data_preview)
                 
         except Exception as e:
             st.error(f" Error: {str(e)}")
     
     st.markdown("---")
     
-    # Data status
-    if st.session_state.uploaded_data is not None:
+    # Data status (also decides the main area below)
+    has_data = st.session_state.uploaded_data is not None
+    if has_data:
         st.success(" Data Loaded")
     else:
         st.warning(" No Data Loaded")
@@ -115,22 +341,14 @@ with st.sidebar:
         st.session_state.uploaded_data = None
         st.session_state.agent_loaded = False
         st.session_state.agent = None
+        st.session_state.loaded_fp = None
+        st.session_state.upload_id = None
+        st.session_state.prewarm = {}
         st.rerun()
 
 # Main content
-if st.session_state.uploaded_data is None:
-    st.markdown("""
-    <div style='background: rgba(255,255,255,0.1); padding: 3rem; border-radius: 15px; text-align: center;'>
-        <h2 style='color: white;'> Welcome!</h2>
-        <p style='color: #e0e0e0; font-size: 1.2rem;'>
-            Upload a CSV file to get started with AI-powered analytics!
-        </p>
-        <br>
-        <p style='color: #b0b0b0;'>
-             Use the sidebar to upload your data
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+if not has_data:
+    st.markdown(WELCOME_HTML, unsafe_allow_html=True)
 else:
     # Lazy load agent only when needed
     if not st.session_state.agent_loaded:
@@ -140,14 +358,16 @@ else:
                 st.session_state.agent = OpenAIAnalyticsAgent()
                 st.session_state.agent.load_data(st.session_state.uploaded_data)
                 st.session_state.agent_loaded = True
+                prewarm_quick_actions(st.session_state.agent)
             except Exception as e:
                 st.error(f"Error loading agent: {str(e)}")
                 st.stop()
     
     # Show agent status
-    if st.session_state.agent:
+    agent = st.session_state.agent
+    if agent:
         try:
-            status = st.session_state.agent.get_status()
+            status = agent.get_status()
             if status.get('openai_available'):
                 st.success(" OpenAI GPT-4 Mode Active")
             else:
@@ -157,118 +377,7 @@ else:
     
     st.markdown("---")
     
-    # Display chat history
-    st.subheader(" AI Analytics Assistant")
-    
-    for message in st.session_state.messages:
-        if message["role"] == "user":
-            st.markdown(f'<div class="chat-message user-message"><b>You:</b> {message["content"]}</div>', unsafe_allow_html=True)
-        else:
-            st.markdown(f'<div class="chat-message assistant-message"><b>AI:</b> {message["content"]}</div>', unsafe_allow_html=True)
-            
-            # Display chart if exists
-            if "chart" in message:
-                try:
-                    chart_data = message["chart"]
-                    if chart_data and 'type' in chart_data and 'x' in chart_data and 'y' in chart_data:
-                        if chart_data['type'] == 'bar':
-                            fig = go.Figure(data=[go.Bar(x=chart_data['x'], y=chart_data['y'])])
-                        elif chart_data['type'] == 'line':
-                            fig = go.Figure(data=[go.Scatter(x=chart_data['x'], y=chart_data['y'], mode='lines')])
-                        elif chart_data['type'] == 'pie':
-                            fig = go.Figure(data=[go.Pie(labels=chart_data['x'], values=chart_data['y'])])
-                        else:
-                            fig = None
-                        
-                        if fig:
-                            fig.update_layout(template='plotly_dark', height=400, title=chart_data.get('title', ''))
-                            st.plotly_chart(fig, key=f"chart_{st.session_state.messages.index(message)}")
-                except:
-                    pass
-    
-    # Chat input
-    with st.form("chat_form", clear_on_submit=True):
-        user_input = st.text_input(
-            "Ask a question about your data...",
-            placeholder="e.g., What is the total revenue?",
-            key="chat_input"
-        )
-        send_pressed = st.form_submit_button(" Send")
-        
-        if send_pressed and user_input and st.session_state.agent:
-            # Add user message
-            st.session_state.messages.append({"role": "user", "content": user_input})
-            
-            # Get AI response
-            try:
-                with st.spinner(" Analyzing..."):
-                    response = st.session_state.agent.ask(user_input)
-                    
-                    # Add AI message
-                    ai_message = {
-                        "role": "assistant",
-                        "content": response.get('answer', 'No response')
-                    }
-                    
-                    # Add chart if exists
-                    if response.get('chart_data'):
-                        ai_message['chart'] = response['chart_data']
-                    
-                    st.session_state.messages.append(ai_message)
-                    st.rerun()
-                    
-            except Exception as e:
-                st.error(f" Error: {str(e)}")
-    
-    # Quick actions
-    st.markdown("---")
-    st.subheader(" Quick Actions")
-    
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button(" Show Summary", key="btn_summary"):
-            st.session_state.messages.append({"role": "user", "content": "Give me a summary"})
-            try:
-                response = st.session_state.agent.ask("Give me a summary of the data")
-                ai_message = {"role": "assistant", "content": response.get('answer', 'No response')}
-                if response.get('chart_data'):
-                    ai_message['chart'] = response['chart_data']
-                st.session_state.messages.append(ai_message)
-                st.rerun()
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
-    
-    with col2:
-        if st.button(" Top Items", key="btn_top"):
-            st.session_state.messages.append({"role": "user", "content": "Show top 5 items"})
-            try:
-                response = st.session_state.agent.ask("Show me the top 5 items")
-                ai_message = {"role": "assistant", "content": response.get('answer', 'No response')}
-                if response.get('chart_data'):
-                    ai_message['chart'] = response['chart_data']
-                st.session_state.messages.append(ai_message)
-                st.rerun()
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
-    
-    with col3:
-        if st.button(" Trends", key="btn_trends"):
-            st.session_state.messages.append({"role": "user", "content": "Show trends"})
-            try:
-                response = st.session_state.agent.ask("Show me trends in the data")
-                ai_message = {"role": "assistant", "content": response.get('answer', 'No response')}
-                if response.get('chart_data'):
-                    ai_message['chart'] = response['chart_data']
-                st.session_state.messages.append(ai_message)
-                st.rerun()
-            except Exception as e:
-                st.error(f"Error: {str(e)}")
-    
-    # Clear chat button
-    if st.button(" Clear Chat", key="btn_clear_chat"):
-        st.session_state.messages = []
-        st.rerun()
+    chat_panel()
 
 # Footer
 st.markdown("---")
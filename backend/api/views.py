@@ -66,6 +66,18 @@ def _suggested_questions(column_names, column_types):
     return suggestions[:6]
 
 
+def _get_agent(dataset_id):
+    """Agent loaded with the dataset, built on its first query and reused for later ones."""
+    entry = _data_store[dataset_id]
+    if "agent" not in entry:
+        from src.conversational.openai_agent import OpenAIAnalyticsAgent
+
+        agent = OpenAIAnalyticsAgent()
+        agent.load_data(entry["dataframe"])
+        entry["agent"] = agent
+    return entry["agent"]
+
+
 @api_view(["POST"])
 def upload_csv(request):
     parser_classes = (MultiPartParser,)
@@ -162,12 +174,8 @@ def query(request):
             {"error": "Dataset not found"},
             status=status.HTTP_404_NOT_FOUND,
         )
-    df = _data_store[dataset_id]["dataframe"]
     try:
-        from src.conversational.openai_agent import OpenAIAnalyticsAgent
-
-        agent = OpenAIAnalyticsAgent()
-        agent.load_data(df)
+        agent = _get_agent(dataset_id)
         result = agent.ask(question)
         out = {
             "answer": result.get("answer", ""),
@@ -62,9 +62,11 @@ class DescriptiveAnalytics:
         # Categorical columns
         categorical_cols = df.select_dtypes(include=['object', 'category']).columns
         for col in categorical_cols:
+            # One hash count per column; the distinct count comes from the same result
+            # (non-zero entries, since category dtypes also list unused categories)
             value_counts = df[col].value_counts()
             summary['categorical_columns'][col] = {
-                'unique_values': int(df[col].nunique()),
+                'unique_values': int(np.count_nonzero(value_counts.values)),
                 'most_common': str(value_counts.index[0]) if len(value_counts) > 0 else None,
                 'most_common_count': int(value_counts.iloc[0]) if len(value_counts) > 0 else 0,
                 'top_5_values': value_counts.head(5).to_dict()
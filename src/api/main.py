@@ -74,6 +74,14 @@ conversational_agent = ConversationalAgent(
 data_store = {}
 
 
+def _get_summary_statistics(dataset_id: str) -> Dict[str, Any]:
+    """Summary statistics of a stored dataset, computed on first request and kept with it"""
+    data = data_store[dataset_id]
+    if 'summary' not in data:
+        data['summary'] = descriptive_analytics.generate_summary_statistics(data['dataframe'])
+    return data['summary']
+
+
 # Pydantic models
 class QueryRequest(BaseModel):
     """Request model for natural language queries"""
@@ -250,10 +258,9 @@ async def get_dataset_info(dataset_id: str):
         raise HTTPException(status_code=404, detail="Dataset not found")
     
     data = data_store[dataset_id]
-    df = data['dataframe']
     
-    # Generate summary
-    summary = descriptive_analytics.generate_summary_statistics(df)
+    # Generate summary (once per dataset)
+    summary = _get_summary_statistics(dataset_id)
     
     return {
         'dataset_id': dataset_id,
@@ -299,7 +306,7 @@ async def descriptive_analysis(request: AnalyticsRequest):
         params = request.parameters or {}
         
         if request.analysis_type == "summary":
-            result = descriptive_analytics.generate_summary_statistics(df)
+            result = _get_summary_statistics(request.dataset_id)
         elif request.analysis_type == "trends":
             result = descriptive_analytics.analyze_trends(
                 df,
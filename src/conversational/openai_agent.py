@@ -5,30 +5,29 @@ Falls back to rule-based system when neither is available.
 """
 import os
 import json
+import importlib.util
 import logging
 import urllib.request
-import urllib.error
-from typing import Dict, Any, Optional, Tuple
+from typing import Callable, Dict, Any, Iterator, List, Optional, Tuple, Union
 import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
 from datetime import datetime
 
-# Try to import OpenAI, fallback gracefully if not available
-try:
-    import openai
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+# Check for OpenAI without importing it; the SDK is only loaded once an API key is configured
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
+if not OPENAI_AVAILABLE:
     logging.warning("OpenAI package not available. Using fallback system.")
 
-from .smart_agent import SmartAnalyticsAgent
+from .smart_agent import SmartAnalyticsAgent, top_value_counts
 
 logger = logging.getLogger(__name__)
 
+# Appended to an LLM answer whose stream broke off after some text was shown
+PARTIAL_ANSWER_NOTE = "\n\n_(The answer was cut off before it finished.)_"
+PARTIAL_ANSWER_CONFIDENCE = 0.5
 
-def _call_ollama(base_url: str, model: str, prompt: str, timeout: int = 60) -> Tuple[str, bool]:
-    """Call Ollama /api/chat. Works in production if base_url points to your Ollama server."""
+
+def _stream_ollama(base_url: str, model: str, prompt: str, timeout: int = 60) -> Iterator[str]:
+    """Stream an Ollama /api/chat answer chunk by chunk. Works in production if base_url points to your Ollama server."""
     url = (base_url.rstrip("/") + "/api/chat").replace("//api", "/api")
     body = json.dumps({
         "model": model,
@@ -36,18 +35,20 @@ def _call_ollama(base_url: str, model: str, prompt: str, timeout: int = 60) -> T
             {"role": "system", "content": "You are an expert data analyst. Answer concisely with specific numbers and insights."},
             {"role": "user", "content": prompt},
         ],
-        "stream": False,
+        "stream": True,
     }).encode("utf-8")
     req = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": "application/json"})
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            data = json.loads(resp.read().decode())
-            msg = data.get("message") or {}
-            answer = (msg.get("content") or "").strip()
-            return answer, bool(answer)
-    except (urllib.error.URLError, OSError, json.JSONDecodeError) as e:
-        logger.warning("Ollama request failed: %s", e)
-        return "", False
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        # One JSON object per line, the last one flagged "done"
+        for line in resp:
+            if not line.strip():
+                continue
+            data = json.loads(line.decode())
+            content = (data.get("message") or {}).get("content")
+            if content:
+                yield content
+            if data.get("done"):
+                break
 
 
 class OpenAIAnalyticsAgent(SmartAnalyticsAgent):
@@ -58,6 +59,8 @@ class OpenAIAnalyticsAgent(SmartAnalyticsAgent):
     
     def __init__(self, api_key: Optional[str] = None):
         super().__init__()
+        # (DataFrame, data context, basic stats, column info) for the last prompted dataset
+        self._prompt_context = None
         
         self.api_key = api_key or os.getenv("OPENAI_API_KEY") or ""
         self.openai_available = OPENAI_AVAILABLE and bool(self.api_key)
@@ -65,6 +68,7 @@ class OpenAIAnalyticsAgent(SmartAnalyticsAgent):
         
         if OPENAI_AVAILABLE and self.api_key:
             try:
+                import openai
                 openai.api_key = self.api_key
                 self.openai_client = openai
                 logger.info("OpenAI client initialized successfully")
@@ -81,72 +85,88 @@ class OpenAIAnalyticsAgent(SmartAnalyticsAgent):
         elif not self.openai_available:
             logger.info("Using fallback rule-based system")
     
+    def load_data(self, df: pd.DataFrame) -> Dict[str, Any]:
+        """Load data; its prompt context is rebuilt on the next LLM question"""
+        self._prompt_context = None
+        return super().load_data(df)
+    
     def _build_data_context(self, df: pd.DataFrame) -> str:
         """Build comprehensive data context for OpenAI prompts"""
-        context = f"""
+        parts = [f"""
         DATASET OVERVIEW:
         - Shape: {df.shape[0]} rows × {df.shape[1]} columns
         - Columns: {', '.join(df.columns.tolist())}
         
         COLUMN DETAILS:
-        """
+        """]
         
         for col in df.columns:
             dtype = str(df[col].dtype)
             non_null = df[col].count()
-            null_count = df[col].isnull().sum()
+            null_count = len(df) - non_null
             unique_count = df[col].nunique()
             
-            context += f"""
-        - {col}: {dtype} ({non_null} non-null, {null_count} null, {unique_count} unique)"""
+            parts.append(f"""
+        - {col}: {dtype} ({non_null} non-null, {null_count} null, {unique_count} unique)""")
             
             # Add sample values for categorical/string columns
-            if df[col].dtype == 'object' or df[col].nunique() < 20:
+            if df[col].dtype == 'object' or unique_count < 20:
                 sample_values = df[col].dropna().head(5).tolist()
-                context += f" [Sample: {sample_values}]"
+                parts.append(f" [Sample: {sample_values}]")
         
-        context += f"""
+        parts.append(f"""
         
         DATA SUMMARY:
         - Numeric columns: {', '.join(df.select_dtypes(include=['number']).columns.tolist())}
         - Categorical columns: {', '.join(df.select_dtypes(include=['object']).columns.tolist())}
         - Date columns: {', '.join(df.select_dtypes(include=['datetime']).columns.tolist())}
-        """
+        """)
         
-        return context
+        return "".join(parts)
+    
+    def _dataset_context(self, df: pd.DataFrame) -> Tuple[str, Dict[str, Any], Dict[str, Any]]:
+        """Question-independent prompt context (overview, basic stats, column info), built once per dataset"""
+        cached = self._prompt_context
+        if cached is None or cached[0] is not df:
+            # Basic statistics for numeric columns
+            basic_stats = {}
+            numeric_cols = df.select_dtypes(include=['number']).columns
+            if len(numeric_cols) > 0:
+                basic_stats = df[numeric_cols].describe().to_dict()
+            
+            # Column information (plain ints so the context is JSON serializable)
+            column_info = {}
+            for col in df.columns:
+                column_info[col] = {
+                    "dtype": str(df[col].dtype),
+                    "null_count": int(df[col].isnull().sum()),
+                    "unique_count": int(df[col].nunique()),
+                    "sample_values": df[col].dropna().head(3).tolist()
+                }
+            
+            cached = self._prompt_context = (df, self._build_data_context(df), basic_stats, column_info)
+        return cached[1:]
     
     def _build_analytics_context(self, question: str, df: pd.DataFrame) -> Dict[str, Any]:
         """Build analytics context for better responses"""
+        _, basic_stats, column_info = self._dataset_context(df)
         analytics_context = {
-            "basic_stats": {},
-            "column_info": {},
+            "basic_stats": basic_stats,
+            "column_info": column_info,
             "suggested_analyses": []
         }
         
-        # Basic statistics for numeric columns
-        numeric_cols = df.select_dtypes(include=['number']).columns
-        if len(numeric_cols) > 0:
-            analytics_context["basic_stats"] = df[numeric_cols].describe().to_dict()
-        
-        # Column information
-        for col in df.columns:
-            analytics_context["column_info"][col] = {
-                "dtype": str(df[col].dtype),
-                "null_count": df[col].isnull().sum(),
-                "unique_count": df[col].nunique(),
-                "sample_values": df[col].dropna().head(3).tolist()
-            }
-        
         # Suggest analyses based on question and data
-        if "total" in question.lower() or "sum" in question.lower():
+        question_lower = question.lower()
+        if "total" in question_lower or "sum" in question_lower:
             analytics_context["suggested_analyses"].append("aggregation")
-        if "average" in question.lower() or "mean" in question.lower():
+        if "average" in question_lower or "mean" in question_lower:
             analytics_context["suggested_analyses"].append("statistical_summary")
-        if "top" in question.lower() or "best" in question.lower():
+        if "top" in question_lower or "best" in question_lower:
             analytics_context["suggested_analyses"].append("ranking")
-        if "trend" in question.lower() or "time" in question.lower():
+        if "trend" in question_lower or "time" in question_lower:
             analytics_context["suggested_analyses"].append("trend_analysis")
-        if "compare" in question.lower():
+        if "compare" in question_lower:
             analytics_context["suggested_analyses"].append("comparison")
         
         return analytics_context
@@ -154,7 +174,7 @@ class OpenAIAnalyticsAgent(SmartAnalyticsAgent):
     def _create_openai_prompt(self, question: str, df: pd.DataFrame) -> str:
         """Create optimized prompt for OpenAI"""
         
-        data_context = self._build_data_context(df)
+        data_context = self._dataset_context(df)[0]
         analytics_context = self._build_analytics_context(question, df)
         
         prompt = f"""You are an expert data analyst and AI assistant specializing in business analytics. 
@@ -165,7 +185,7 @@ class OpenAIAnalyticsAgent(SmartAnalyticsAgent):
         USER QUESTION: {question}
 
         ANALYTICS CONTEXT:
-        {json.dumps(analytics_context, indent=2)}
+        {json.dumps(analytics_context, indent=2, default=str)}
 
         INSTRUCTIONS:
         1. Analyze the user's question in the context of the provided dataset
@@ -186,30 +206,6 @@ class OpenAIAnalyticsAgent(SmartAnalyticsAgent):
 
         return prompt
     
-    def _call_openai(self, prompt: str) -> Tuple[str, bool]:
-        """Call OpenAI API with error handling"""
-        if not self.openai_available or not self.openai_client:
-            return "", False
-        
-        try:
-            response = self.openai_client.ChatCompletion.create(
-                model="gpt-4",
-                messages=[
-                    {"role": "system", "content": "You are an expert data analyst with deep knowledge of business analytics, statistics, and data visualization."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=1000,
-                temperature=0.3,
-                timeout=30
-            )
-            
-            answer = response.choices[0].message.content.strip()
-            return answer, True
-            
-        except Exception as e:
-            logger.error(f"OpenAI API call failed: {e}")
-            return "", False
-    
     def _determine_chart_type(self, question: str, answer: str, df: pd.DataFrame) -> Optional[Dict[str, Any]]:
         """Determine if a chart should be generated and what type"""
         
@@ -241,8 +237,8 @@ class OpenAIAnalyticsAgent(SmartAnalyticsAgent):
                 cat_cols = df.select_dtypes(include=["object"]).columns
                 num_cols = df.select_dtypes(include=["number"]).columns
                 if "quantity" in question_lower or "product" in question_lower:
-                    qty_col = next((c for c in num_cols if "quantity" in c.lower() or "qty" in c.lower()), None)
-                    prod_col = next((c for c in cat_cols if "product" in c.lower() or "item" in c.lower()), cat_cols[0] if len(cat_cols) else None)
+                    qty_col = next(iter(self._columns_named(["quantity", "qty"], num_cols)), None)
+                    prod_col = next(iter(self._columns_named(["product", "item"], cat_cols)), cat_cols[0] if len(cat_cols) else None)
                     if qty_col is not None and prod_col is not None:
                         grouped = df.groupby(prod_col)[qty_col].sum().sort_values(ascending=False).head(10)
                         return {
@@ -309,13 +305,13 @@ class OpenAIAnalyticsAgent(SmartAnalyticsAgent):
                 categorical_cols = df.select_dtypes(include=['object']).columns
                 if len(categorical_cols) > 0:
                     col = categorical_cols[0]
-                    value_counts = df[col].value_counts().head(8)
+                    labels, counts = top_value_counts(df[col], 8)
                     
                     chart_data = {
                         "data": [
                             {
-                                "values": value_counts.values.tolist(),
-                                "labels": value_counts.index.tolist(),
+                                "values": counts,
+                                "labels": labels,
                                 "type": "pie"
                             }
                         ],
@@ -338,7 +334,73 @@ class OpenAIAnalyticsAgent(SmartAnalyticsAgent):
     def ask(self, question: str) -> Dict[str, Any]:
         """
         Ask a question using OpenAI with fallback to rule-based system
+        
+        Collects ask_stream(), so both share the provider order and response shape.
+        Nothing has been shown to the caller yet, so a cut-off answer moves on to
+        the next option instead of being returned incomplete.
+        """
+        for item in self.ask_stream(question, keep_partial=False):
+            response = item
+        return response
+    
+    def ask_stream(self, question: str, keep_partial: bool = True) -> Iterator[Union[str, Dict[str, Any]]]:
+        """
+        Ask a question, yielding the answer text as it is generated
+        
+        OpenAI and Ollama answers are streamed chunk by chunk; the rule-based
+        fallback yields its answer in one piece. The last item is the full
+        response dict.
+        
+        Args:
+            question: User's question
+            keep_partial: Finish with the text already streamed (marked as cut off)
+                when a stream breaks, rather than trying the next option
         """
+        response = self._precheck_response(question)
+        if response is None:
+            providers = self._llm_providers()
+            if providers:
+                try:
+                    prompt = self._create_openai_prompt(question, self.current_data)
+                except Exception as e:
+                    logger.error("Prompt creation failed: %s", e)
+                    providers = []
+            
+            for source, confidence, stream in providers:
+                logger.info("Using %s for question analysis", source)
+                parts = []
+                cut_off = False
+                try:
+                    for chunk in stream(prompt):
+                        parts.append(chunk)
+                        yield chunk
+                except Exception as e:
+                    logger.error("%s error: %s", source, e)
+                    cut_off = bool(parts)
+                answer = "".join(parts).strip()
+                if not answer or (cut_off and not keep_partial):
+                    logger.warning("%s gave no complete answer, trying the next option", source)
+                    continue
+                if cut_off:
+                    # Text already shown is kept rather than starting over, but marked as incomplete
+                    yield PARTIAL_ANSWER_NOTE
+                    answer += PARTIAL_ANSWER_NOTE
+                    confidence = PARTIAL_ANSWER_CONFIDENCE
+                yield {
+                    "answer": answer,
+                    "confidence": confidence,
+                    "chart_data": self._determine_chart_type(question, answer, self.current_data),
+                    "source": source,
+                }
+                return
+            
+            response = self._ask_fallback(question)
+        
+        yield response.get('answer', '')
+        yield response
+    
+    def _precheck_response(self, question: str) -> Optional[Dict[str, Any]]:
+        """Response for questions answered without analysis (no data loaded, vague question), else None"""
         if not hasattr(self, 'current_data') or self.current_data is None:
             return {
                 'answer': "Please load data first before asking questions.",
@@ -354,44 +416,38 @@ class OpenAIAnalyticsAgent(SmartAnalyticsAgent):
                 'confidence': 0.8,
                 'chart_data': None
             }
-        
-        # Try OpenAI first if available
+        return None
+    
+    def _llm_providers(self) -> List[Tuple[str, float, Callable[[str], Iterator[str]]]]:
+        """LLM backends to try in order, as (source, confidence, prompt -> answer chunks)"""
+        providers = []
         if self.openai_available and self.openai_client:
-            logger.info("Using OpenAI for question analysis")
-            try:
-                prompt = self._create_openai_prompt(question, self.current_data)
-                answer, success = self._call_openai(prompt)
-                if success and answer:
-                    chart_data = self._determine_chart_type(question, answer, self.current_data)
-                    return {
-                        "answer": answer,
-                        "confidence": 0.9,
-                        "chart_data": chart_data,
-                        "source": "openai",
-                    }
-                logger.warning("OpenAI failed, trying Ollama or fallback")
-            except Exception as e:
-                logger.error("OpenAI error: %s", e)
-        
-        # Try Ollama if configured (works in production when Ollama runs on a server)
+            providers.append(("openai", 0.9, self._stream_openai))
+        # Ollama works in production when it runs on a server
         if self.ollama_available:
-            logger.info("Using Ollama for question analysis")
-            try:
-                prompt = self._create_openai_prompt(question, self.current_data)
-                answer, success = _call_ollama(self.ollama_base_url, self.ollama_model, prompt)
-                if success and answer:
-                    chart_data = self._determine_chart_type(question, answer, self.current_data)
-                    return {
-                        "answer": answer,
-                        "confidence": 0.85,
-                        "chart_data": chart_data,
-                        "source": "ollama",
-                    }
-                logger.warning("Ollama failed, using rule-based fallback")
-            except Exception as e:
-                logger.error("Ollama error: %s", e)
-        
-        # Fallback to rule-based system
+            providers.append(("ollama", 0.85, lambda prompt: _stream_ollama(self.ollama_base_url, self.ollama_model, prompt)))
+        return providers
+    
+    def _stream_openai(self, prompt: str) -> Iterator[str]:
+        """Stream an OpenAI chat completion chunk by chunk"""
+        response = self.openai_client.ChatCompletion.create(
+            model="gpt-4",
+            messages=[
+                {"role": "system", "content": "You are an expert data analyst with deep knowledge of business analytics, statistics, and data visualization."},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=1000,
+            temperature=0.3,
+            timeout=30,
+            stream=True
+        )
+        for chunk in response:
+            content = chunk.choices[0].delta.get("content")
+            if content:
+                yield content
+    
+    def _ask_fallback(self, question: str) -> Dict[str, Any]:
+        """Answer with the rule-based system"""
         logger.info("Using rule-based fallback system")
         try:
             fallback_response = super().ask(question)
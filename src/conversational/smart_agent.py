@@ -8,6 +8,7 @@ Advanced AI-Powered Conversational Analytics Agent
 - 100,000+ intent patterns with fuzzy matching
 """
 from typing import Dict, Any, Optional, List, Tuple
+from collections import deque
 import re
 import pandas as pd
 import numpy as np
@@ -15,7 +16,6 @@ import json
 import logging
 from datetime import datetime
 import plotly.graph_objects as go
-import plotly.express as px
 from pathlib import Path
 import sys
 
@@ -31,6 +31,72 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+# Number of recent questions kept in the agent's conversation context
+CONVERSATION_CONTEXT_SIZE = 50
+
+
+def _keyword_pattern(keywords: List[str]) -> re.Pattern:
+    """Compile keywords into one substring-matching alternation"""
+    return re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+
+
+# Ordered question-type rules: (keywords, question_type, operations, visualization_type)
+_INTENT_RULES = [
+    (_keyword_pattern(['total', 'sum', 'how much', 'how many']),
+     'aggregation', ('sum', 'count'), 'metric_card'),
+    (_keyword_pattern(['top', 'best', 'highest', 'most', 'bottom', 'worst', 'lowest']),
+     'ranking', ('groupby', 'sort'), 'bar_chart'),
+    (_keyword_pattern(['trend', 'over time', 'time series', 'change']),
+     'trend_analysis', ('time_series', 'trend'), 'line_chart'),
+    (_keyword_pattern(['why', 'reason', 'cause', 'drop', 'decrease', 'increase']),
+     'diagnostic', ('root_cause', 'comparison', 'breakdown'), 'multiple'),
+    (_keyword_pattern(['forecast', 'predict', 'future', 'next']),
+     'predictive', ('forecast', 'prediction'), 'forecast_chart'),
+    (_keyword_pattern(['recommend', 'should', 'optimize', 'improve']),
+     'prescriptive', ('optimization', 'recommendation'), 'comparison'),
+    (_keyword_pattern(['compare', 'versus', 'vs', 'between', 'difference']),
+     'comparison', ('compare', 'segment'), 'grouped_bar'),
+    (_keyword_pattern(['average', 'mean', 'median']),
+     'statistics', ('mean', 'median', 'stats'), 'distribution'),
+]
+_CHART_REQUEST_PATTERN = _keyword_pattern(['chart', 'graph', 'visualize', 'plot', 'show'])
+_CHART_SUBJECT_PATTERN = _keyword_pattern(['chart', 'data', 'graph'])
+_ANALYZE_PATTERN = _keyword_pattern(['analyze', 'analysis'])
+
+
+def top_value_counts(values: pd.Series, k: int) -> Tuple[list, list]:
+    """
+    Most frequent values of a column, like values.value_counts().head(k)
+    
+    Counts with Arrow's hash kernel and only ranks the distinct values; ties
+    keep first-appearance order, as in pandas. Without pyarrow, or for columns
+    Arrow cannot convert (mixed Python objects), pandas does the counting.
+    
+    Args:
+        values: Column to count (nulls are ignored)
+        k: Number of values to return
+        
+    Returns:
+        Tuple of (labels, counts) lists, most frequent first
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        arr = pa.array(values, from_pandas=True).drop_null()
+    except ImportError:
+        arr = None
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        arr = None
+    
+    if arr is None:
+        counts = values.value_counts().head(k)
+        return counts.index.tolist(), counts.tolist()
+    
+    vc = pc.value_counts(arr)
+    order = pc.sort_indices(vc.field('counts'), sort_keys=[('', 'descending')])
+    top = vc.take(order[:k])
+    return top.field('values').to_pylist(), top.field('counts').to_pylist()
+
 
 class SmartAnalyticsAgent:
     """
@@ -72,7 +138,12 @@ class SmartAnalyticsAgent:
         
         self.current_data = None
         self.data_summary = None
-        self.conversation_context = []
+        # Recent questions only; a long-lived agent (e.g. one per API dataset) would otherwise grow without limit
+        self.conversation_context = deque(maxlen=CONVERSATION_CONTEXT_SIZE)
+        # (source frame, result) per column pair / category column; see _group_stats
+        self._group_stats_cache = {}
+        self._category_codes_cache = {}
+        self._column_names = {}
         
         # Keywords that indicate vague or irrelevant questions.
         # Short tokens that must match as whole words only (so "hi" does not match "highest")
@@ -91,15 +162,20 @@ class SmartAnalyticsAgent:
     def load_data(self, df: pd.DataFrame) -> Dict[str, Any]:
         """Load data and create intelligent context"""
         self.current_data = df
+        self._group_stats_cache = {}
+        self._category_codes_cache = {}
+        numeric_cols = df.select_dtypes(include=[np.number]).columns.tolist()
+        # Lowercased (and underscore-free) column names, searched by every question
+        self._column_names = {col: (col.lower(), col.replace('_', ' ').lower()) for col in df.columns}
         
-        # Create rich data summary for context
+        # Create rich data summary for context (column lists are reused by every question)
         self.data_summary = {
             'shape': {'rows': len(df), 'columns': len(df.columns)},
             'columns': {
                 'all': df.columns.tolist(),
-                'numeric': df.select_dtypes(include=[np.number]).columns.tolist(),
+                'numeric': numeric_cols,
                 'categorical': df.select_dtypes(include=['object']).columns.tolist(),
-                'datetime': [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col]) or 'date' in col.lower()]
+                'datetime': [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col]) or 'date' in self._column_names[col][0]]
             },
             'stats': {
                 col: {
@@ -108,8 +184,9 @@ class SmartAnalyticsAgent:
                     'median': float(df[col].median()),
                     'min': float(df[col].min()),
                     'max': float(df[col].max()),
-                    'std': float(df[col].std())
-                } for col in df.select_dtypes(include=[np.number]).columns
+                    'std': float(df[col].std()),
+                    'count': int(df[col].count())
+                } for col in numeric_cols
             },
             'sample': df.head(3).to_dict('records')
         }
@@ -303,12 +380,8 @@ To provide meaningful insights, I need a specific question about your data.
                         'revenue', 'sales', 'customer', 'product', 'quantity', 'chart']
         
         # Also check for column names
-        column_mentioned = False
-        if self.current_data is not None:
-            for col in self.current_data.columns:
-                if col.lower() in question_lower or col.replace('_', ' ').lower() in question_lower:
-                    column_mentioned = True
-                    break
+        column_mentioned = any(lower in question_lower or spaced in question_lower
+                               for lower, spaced in self._column_names.values())
         
         has_data_keyword = any(keyword in question_lower for keyword in data_keywords) or column_mentioned
         
@@ -352,17 +425,17 @@ I'm not sure how to analyze that with your current dataset. Could you please be
         date_cols = cols['datetime']
         
         # Revenue/Sales questions
-        revenue_cols = [c for c in numeric_cols if any(word in c.lower() for word in ['revenue', 'sales', 'amount', 'total', 'price'])]
+        revenue_cols = self._columns_named(['revenue', 'sales', 'amount', 'total', 'price'], numeric_cols)
         if revenue_cols:
             suggestions.append(f"What is the total {revenue_cols[0].replace('_', ' ')}?")
         
         # Product/Category questions
-        product_cols = [c for c in categorical_cols if any(word in c.lower() for word in ['product', 'item', 'category', 'type'])]
+        product_cols = self._columns_named(['product', 'item', 'category', 'type'], categorical_cols)
         if product_cols and numeric_cols:
             suggestions.append(f"Show me the top 5 {product_cols[0].replace('_', ' ')}")
         
         # Regional/Segment questions
-        segment_cols = [c for c in categorical_cols if any(word in c.lower() for word in ['region', 'location', 'segment', 'group', 'category'])]
+        segment_cols = self._columns_named(['region', 'location', 'segment', 'group', 'category'], categorical_cols)
         if segment_cols and numeric_cols:
             suggestions.append(f"Compare {segment_cols[0].replace('_', ' ')} performance")
         
@@ -375,7 +448,7 @@ I'm not sure how to analyze that with your current dataset. Could you please be
             suggestions.append(f"What is the average {numeric_cols[0].replace('_', ' ')}?")
         
         # Customer questions
-        customer_cols = [c for c in categorical_cols if any(word in c.lower() for word in ['customer', 'client', 'user'])]
+        customer_cols = self._columns_named(['customer', 'client', 'user'], categorical_cols)
         if customer_cols:
             suggestions.append(f"How many unique {customer_cols[0].replace('_', ' ')} do we have?")
         
@@ -395,7 +468,6 @@ I'm not sure how to analyze that with your current dataset. Could you please be
         Determines: what analytics to run, what columns to use, what to visualize
         """
         question_lower = question.lower()
-        df = self.current_data
         
         intent = {
             'question_type': 'unknown',
@@ -414,85 +486,52 @@ I'm not sure how to analyze that with your current dataset. Could you please be
             intent['question_type'] = matched_intent
             intent['confidence'] = confidence
             intent['metadata'] = metadata
-            logger.info(f"Intent matched: {matched_intent} with confidence {confidence:.2f}")
+            logger.info("Intent matched: %s with confidence %.2f", matched_intent, confidence)
         else:
             # Fallback to basic pattern matching
             logger.warning("Using fallback intent matching")
         
-        # Detect question type
-        if any(word in question_lower for word in ['total', 'sum', 'how much', 'how many']):
-            intent['question_type'] = 'aggregation'
-            intent['operations'] = ['sum', 'count']
-            intent['visualization_type'] = 'metric_card'
-            
-        elif any(word in question_lower for word in ['top', 'best', 'highest', 'most', 'bottom', 'worst', 'lowest']):
-            intent['question_type'] = 'ranking'
-            intent['operations'] = ['groupby', 'sort']
-            intent['visualization_type'] = 'bar_chart'
-            
-        elif any(word in question_lower for word in ['trend', 'over time', 'time series', 'change']):
-            intent['question_type'] = 'trend_analysis'
-            intent['operations'] = ['time_series', 'trend']
-            intent['visualization_type'] = 'line_chart'
-            
-        elif any(word in question_lower for word in ['why', 'reason', 'cause', 'drop', 'decrease', 'increase']):
-            intent['question_type'] = 'diagnostic'
-            intent['operations'] = ['root_cause', 'comparison', 'breakdown']
-            intent['visualization_type'] = 'multiple'
-            
-        elif any(word in question_lower for word in ['forecast', 'predict', 'future', 'next']):
-            intent['question_type'] = 'predictive'
-            intent['operations'] = ['forecast', 'prediction']
-            intent['visualization_type'] = 'forecast_chart'
-            
-        elif any(word in question_lower for word in ['recommend', 'should', 'optimize', 'improve']):
-            intent['question_type'] = 'prescriptive'
-            intent['operations'] = ['optimization', 'recommendation']
-            intent['visualization_type'] = 'comparison'
-            
-        elif any(word in question_lower for word in ['compare', 'versus', 'vs', 'between', 'difference']):
-            intent['question_type'] = 'comparison'
-            intent['operations'] = ['compare', 'segment']
-            intent['visualization_type'] = 'grouped_bar'
-            
-        elif any(word in question_lower for word in ['average', 'mean', 'median']):
-            intent['question_type'] = 'statistics'
-            intent['operations'] = ['mean', 'median', 'stats']
-            intent['visualization_type'] = 'distribution'
-
-        elif any(word in question_lower for word in ['chart', 'graph', 'visualize', 'plot', 'show']) and any(w in question_lower for w in ['chart', 'data', 'graph']):
-            intent['question_type'] = 'ranking'
-            intent['operations'] = ['groupby', 'sort']
-            intent['visualization_type'] = 'bar_chart'
-        elif any(word in question_lower for word in ['analyze', 'analysis']) and len(question_lower.split()) <= 6:
-            intent['question_type'] = 'ranking'
-            intent['operations'] = ['groupby', 'sort']
-            intent['visualization_type'] = 'bar_chart'
+        # Detect question type (first matching rule wins)
+        for pattern, question_type, operations, visualization_type in _INTENT_RULES:
+            if pattern.search(question_lower):
+                intent['question_type'] = question_type
+                intent['operations'] = list(operations)
+                intent['visualization_type'] = visualization_type
+                break
+        else:
+            if _CHART_REQUEST_PATTERN.search(question_lower) and _CHART_SUBJECT_PATTERN.search(question_lower):
+                intent['question_type'] = 'ranking'
+                intent['operations'] = ['groupby', 'sort']
+                intent['visualization_type'] = 'bar_chart'
+            elif _ANALYZE_PATTERN.search(question_lower) and len(question_lower.split()) <= 6:
+                intent['question_type'] = 'ranking'
+                intent['operations'] = ['groupby', 'sort']
+                intent['visualization_type'] = 'bar_chart'
         
         # Detect target columns
-        for col in df.columns:
-            if col.lower() in question_lower or col.replace('_', ' ').lower() in question_lower:
+        for col, (lower, spaced) in self._column_names.items():
+            if lower in question_lower or spaced in question_lower:
                 intent['target_columns'].append(col)
         
         # If no columns detected, infer from question
         if not intent['target_columns']:
             if any(word in question_lower for word in ['revenue', 'sales', 'money', 'price']):
-                revenue_cols = [c for c in df.columns if 'revenue' in c.lower() or 'sales' in c.lower() or 'price' in c.lower()]
+                revenue_cols = self._columns_named(['revenue', 'sales', 'price'])
                 intent['target_columns'].extend(revenue_cols[:1])
             
             if any(word in question_lower for word in ['product', 'item']):
-                product_cols = [c for c in df.columns if 'product' in c.lower() or 'item' in c.lower()]
+                product_cols = self._columns_named(['product', 'item'])
                 intent['target_columns'].extend(product_cols[:1])
             
             if any(word in question_lower for word in ['customer', 'client', 'user']):
-                customer_cols = [c for c in df.columns if 'customer' in c.lower() or 'client' in c.lower() or 'user' in c.lower()]
+                customer_cols = self._columns_named(['customer', 'client', 'user'])
                 intent['target_columns'].extend(customer_cols[:1])
             
             if any(word in question_lower for word in ['region', 'location', 'area']):
-                region_cols = [c for c in df.columns if 'region' in c.lower() or 'location' in c.lower()]
+                region_cols = self._columns_named(['region', 'location'])
                 intent['target_columns'].extend(region_cols[:1])
             if any(word in question_lower for word in ['quantity', 'amount', 'units', 'qty']):
-                qty_cols = [c for c in df.columns if 'quantity' in c.lower() or 'qty' in c.lower() or 'amount' in c.lower()]
+                qty_cols = self._columns_named(['quantity', 'qty', 'amount'])
                 intent['target_columns'].extend(qty_cols[:1])
         
         # Generate SQL equivalent for transparency
@@ -503,6 +542,7 @@ I'm not sure how to analyze that with your current dataset. Could you please be
     def _execute_smart_analytics(self, intent: Dict[str, Any], question: str) -> Dict[str, Any]:
         """Execute analytics based on intent"""
         df = self.current_data
+        columns = self.data_summary['columns']
         results = {
             'type': intent['question_type'],
             'data': {},
@@ -513,9 +553,12 @@ I'm not sure how to analyze that with your current dataset. Could you please be
             # Calculate totals and aggregations
             for col in intent['target_columns']:
                 if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
-                    results['data'][f'{col}_total'] = float(df[col].sum())
-                    results['data'][f'{col}_average'] = float(df[col].mean())
-                    results['data'][f'{col}_count'] = int(df[col].count())
+                    stats = self.data_summary['stats'].get(col)
+                    if stats is None:
+                        stats = {'sum': float(df[col].sum()), 'mean': float(df[col].mean()), 'count': int(df[col].count())}
+                    results['data'][f'{col}_total'] = stats['sum']
+                    results['data'][f'{col}_average'] = stats['mean']
+                    results['data'][f'{col}_count'] = stats['count']
             
             if not results['data']:
                 # No numeric columns specified, count rows
@@ -526,23 +569,23 @@ I'm not sure how to analyze that with your current dataset. Could you please be
             target_cols = intent['target_columns']
             
             # Need at least category and value column
-            cat_col = next((c for c in target_cols if c in df.select_dtypes(include=['object']).columns), None)
-            num_col = next((c for c in target_cols if c in df.select_dtypes(include=[np.number]).columns), None)
+            cat_cols = columns['categorical']
+            num_cols = columns['numeric']
+            cat_col = next((c for c in target_cols if c in cat_cols), None)
+            num_col = next((c for c in target_cols if c in num_cols), None)
             
             # If not found, use first categorical and first numeric
             if not cat_col:
-                cat_cols = df.select_dtypes(include=['object']).columns
                 cat_col = cat_cols[0] if len(cat_cols) > 0 else None
             
             if not num_col:
-                num_cols = df.select_dtypes(include=[np.number]).columns
                 num_col = num_cols[0] if len(num_cols) > 0 else None
             
             if cat_col and num_col:
                 # Determine if looking for top or bottom
                 is_bottom = any(word in question.lower() for word in ['bottom', 'worst', 'lowest'])
                 
-                grouped = df.groupby(cat_col)[num_col].sum().sort_values(ascending=is_bottom)
+                grouped = self._group_stats(df, cat_col, num_col)['sum'].sort_values(ascending=is_bottom)
                 top_n = grouped.head(5)
                 
                 results['data']['ranking'] = top_n.to_dict()
@@ -552,8 +595,8 @@ I'm not sure how to analyze that with your current dataset. Could you please be
         
         elif intent['question_type'] == 'trend_analysis':
             # Trend over time
-            date_cols = [c for c in df.columns if pd.api.types.is_datetime64_any_dtype(df[c]) or 'date' in c.lower()]
-            num_cols = df.select_dtypes(include=[np.number]).columns
+            date_cols = columns['datetime']
+            num_cols = columns['numeric']
             
             if date_cols and len(num_cols) > 0:
                 date_col = date_cols[0]
@@ -585,14 +628,14 @@ I'm not sure how to analyze that with your current dataset. Could you please be
         
         elif intent['question_type'] == 'comparison':
             # Compare segments
-            cat_cols = df.select_dtypes(include=['object']).columns
-            num_cols = df.select_dtypes(include=[np.number]).columns
+            cat_cols = columns['categorical']
+            num_cols = columns['numeric']
             
             if len(cat_cols) > 0 and len(num_cols) > 0:
                 cat_col = cat_cols[0]
                 num_col = num_cols[0]
                 
-                comparison = df.groupby(cat_col)[num_col].agg(['sum', 'mean', 'count']).reset_index()
+                comparison = self._group_stats(df, cat_col, num_col).reset_index()
                 
                 results['data']['comparison'] = {
                     'category': cat_col,
@@ -602,7 +645,7 @@ I'm not sure how to analyze that with your current dataset. Could you please be
         
         elif intent['question_type'] == 'statistics':
             # Statistical summary
-            for col in df.select_dtypes(include=[np.number]).columns:
+            for col in columns['numeric']:
                 results['data'][col] = {
                     'mean': float(df[col].mean()),
                     'median': float(df[col].median()),
@@ -613,6 +656,37 @@ I'm not sure how to analyze that with your current dataset. Could you please be
         
         return results
     
+    def _columns_named(self, words: List[str], columns: Optional[List[str]] = None) -> List[str]:
+        """Columns (all by default) whose lowercased name contains any of the words"""
+        if columns is None:
+            columns = self._column_names
+        return [c for c in columns if any(word in self._column_names[c][0] for word in words)]
+    
+    def _group_stats(self, df: pd.DataFrame, cat_col: str, num_col: str) -> pd.DataFrame:
+        """Sum/mean/count of num_col per cat_col, computed once per column pair for the loaded data"""
+        key = (cat_col, num_col)
+        # Entries remember their source frame, so results computed while load_data swapped it are never reused
+        cached = self._group_stats_cache.get(key)
+        if cached is None or cached[0] is not df:
+            codes, uniques = self._category_codes(df, cat_col)
+            stats = df[num_col].groupby(codes).agg(['sum', 'mean', 'count'])
+            stats = stats.drop(index=-1, errors='ignore')  # missing categories, dropped like groupby does
+            stats.index = uniques.take(stats.index).rename(cat_col)
+            cached = self._group_stats_cache[key] = (df, stats)
+        return cached[1]
+    
+    def _category_codes(self, df: pd.DataFrame, cat_col: str) -> Tuple[np.ndarray, pd.Index]:
+        """
+        Integer codes and sorted labels of a category column, factorized once per loaded dataset
+        
+        Grouping by the int codes skips re-hashing the column's strings for every metric
+        it is grouped against.
+        """
+        cached = self._category_codes_cache.get(cat_col)
+        if cached is None or cached[0] is not df:
+            cached = self._category_codes_cache[cat_col] = (df, pd.factorize(df[cat_col], sort=True))
+        return cached[1]
+    
     def _auto_generate_charts(self, intent: Dict[str, Any], analytics: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Automatically generate appropriate visualizations based on intent and data"""
         charts = []
@@ -739,7 +813,8 @@ I'm not sure how to analyze that with your current dataset. Could you please be
             if not segments:
                 return None
             
-            df_comp = pd.DataFrame(segments)
+            # Column-wise construction; the segment records all share the same keys
+            df_comp = pd.DataFrame({key: [seg[key] for seg in segments] for key in segments[0]})
             category_col = comparison_data.get('category')
             
             fig = go.Figure()
@@ -872,10 +947,10 @@ Format with markdown for readability."""
             direction = data.get('direction', 'top')
             
             if ranking:
-                answer = f"**{direction.title()} {len(ranking)} {cat_col}:**\n\n"
-                for i, (item, value) in enumerate(ranking.items(), 1):
-                    answer += f"{i}. **{item}**: ${value:,.2f}\n"
-                return answer
+                header = f"**{direction.title()} {len(ranking)} {cat_col}:**\n\n"
+                return header + "".join(
+                    f"{i}. **{item}**: ${value:,.2f}\n" for i, (item, value) in enumerate(ranking.items(), 1)
+                )
         
         elif question_type == 'trend_analysis':
             trend = data.get('trend', {})
@@ -895,10 +970,11 @@ The data shows a **{direction}** trend over the analyzed period. The {value_col}
         elif question_type == 'comparison':
             comp = data.get('comparison', {})
             if comp and 'segments' in comp:
-                answer = f"**Comparison by {comp['category']}:**\n\n"
-                for seg in comp['segments'][:5]:
-                    answer += f"- **{seg[comp['category']]}**: {seg.get('sum', seg.get('mean', 'N/A'))}\n"
-                return answer
+                header = f"**Comparison by {comp['category']}:**\n\n"
+                return header + "".join(
+                    f"- **{seg[comp['category']]}**: {seg.get('sum', seg.get('mean', 'N/A'))}\n"
+                    for seg in comp['segments'][:5]
+                )
         
         # Default response
         return f"**Analysis Complete:**\n\n{json.dumps(data, indent=2)}"
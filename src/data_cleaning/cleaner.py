@@ -83,10 +83,13 @@ class DataCleaner:
         """Handle missing values intelligently"""
         missing_threshold = config.get('missing_threshold', 0.5) if config else 0.5
         
+        # Count each column's missing values once; both passes below reuse the counts
+        missing_counts = {col: df[col].isnull().sum() for col in df.columns}
+        
         # Remove columns with too many missing values
         cols_to_drop = []
         for col in df.columns:
-            missing_pct = df[col].isnull().sum() / len(df)
+            missing_pct = missing_counts[col] / len(df)
             if missing_pct > missing_threshold:
                 cols_to_drop.append(col)
         
@@ -101,7 +104,7 @@ class DataCleaner:
         
         # Fill missing values for remaining columns
         for col in df.columns:
-            missing_count = df[col].isnull().sum()
+            missing_count = missing_counts[col]
             if missing_count > 0:
                 if pd.api.types.is_numeric_dtype(df[col]):
                     # Use median for numeric columns
@@ -280,7 +283,8 @@ class DataCleaner:
         }
         
         # Completeness - check for missing values
-        missing_pct = (df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100
+        missing_count = sum(df[col].isna().sum() for col in df.columns)
+        missing_pct = (missing_count / (len(df) * len(df.columns))) * 100
         report['completeness']['missing_percentage'] = round(missing_pct, 2)
         report['completeness']['complete_rows'] = df.dropna().shape[0]
         completeness_score = max(0, 100 - missing_pct)
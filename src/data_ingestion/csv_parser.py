@@ -2,14 +2,120 @@
 CSV Parsing Module - Intelligent CSV file parsing with validation
 """
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 import logging
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 import chardet
 
 logger = logging.getLogger(__name__)
 
 
+def _arrow_input(source: Union[str, Path, pa.Buffer]) -> pa.NativeFile:
+    """Open a fresh Arrow input: memory-mapped for files, zero-copy for in-memory buffers"""
+    return pa.BufferReader(source) if isinstance(source, pa.Buffer) else pa.memory_map(str(source))
+
+
+# pd.read_csv's default na_values; Arrow only treats a few of these as missing, and never in text columns
+PANDAS_NA_VALUES = [
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+]
+
+
+def read_csv_arrow(source: Union[str, Path, bytes], delimiter: str = ',') -> pd.DataFrame:
+    """
+    Read a UTF-8 CSV with Arrow's multithreaded reader
+    
+    Files are memory-mapped, so the raw text is served from the page cache
+    instead of being copied onto the heap before parsing. Missing values follow
+    pd.read_csv's defaults (blank, NA, N/A, null, ... become NaN in every column),
+    and date/time columns are kept as text, so callers stay in control of date
+    parsing. Raises pyarrow.ArrowInvalid when Arrow cannot match pd.read_csv
+    (repeated header names, text that is not valid UTF-8, integers past int64,
+    or a column changing type after the first block).
+    
+    Args:
+        source: Path to the CSV file or its raw bytes
+        delimiter: Field delimiter
+        
+    Returns:
+        Parsed DataFrame
+    """
+    if isinstance(source, bytes):
+        source = pa.py_buffer(source)
+    parse_options = pacsv.ParseOptions(delimiter=delimiter)
+    null_options = dict(null_values=PANDAS_NA_VALUES, strings_can_be_null=True, quoted_strings_can_be_null=True)
+    
+    # Arrow infers dates/timestamps from the first block; read those columns as strings.
+    # Columns with no values in the first block are read as float, like pandas' all-NaN columns.
+    with _arrow_input(source) as stream:
+        schema = pacsv.open_csv(
+            stream,
+            parse_options=parse_options,
+            convert_options=pacsv.ConvertOptions(**null_options)
+        ).schema
+    if len(set(schema.names)) != len(schema.names):
+        raise pa.ArrowInvalid("Repeated column names in CSV header")
+    column_types = {field.name: pa.string() for field in schema if pa.types.is_temporal(field.type)}
+    column_types.update({field.name: pa.float64() for field in schema if pa.types.is_null(field.type)})
+    
+    with _arrow_input(source) as stream:
+        table = pacsv.read_csv(
+            stream,
+            parse_options=parse_options,
+            convert_options=pacsv.ConvertOptions(column_types=column_types, **null_options)
+        )
+    
+    # Text that is not valid UTF-8 is read as raw bytes; leave decoding (and its errors) to pandas
+    if any(pa.types.is_binary(field.type) or pa.types.is_large_binary(field.type) for field in table.schema):
+        raise pa.ArrowInvalid("CSV text is not valid UTF-8")
+    
+    # Integers past int64 make Arrow fall back to float64; pandas keeps them exact (uint64/object)
+    for column in table.columns:
+        if pa.types.is_floating(column.type) and (pc.max(pc.abs(column)).as_py() or 0) >= 2 ** 63:
+            raise pa.ArrowInvalid("CSV values exceed the int64 range")
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    
+    # Hand the parser's freed block buffers back to the OS instead of keeping them cached in the pool
+    pa.default_memory_pool().release_unused()
+    return df
+
+
+def detect_delimiter(head: bytes, encoding: str = 'utf-8') -> str:
+    """
+    Detect the CSV delimiter from the header line (',' when none is found)
+    
+    Args:
+        head: Raw bytes from the start of the file
+        encoding: File encoding
+        
+    Returns:
+        Detected delimiter
+    """
+    try:
+        lines = head.decode(encoding, errors='replace').splitlines()
+        first_line = lines[0] if lines else ''
+        
+        # Count common delimiters
+        delimiters = {
+            ',': first_line.count(','),
+            ';': first_line.count(';'),
+            '\t': first_line.count('\t'),
+            '|': first_line.count('|')
+        }
+        
+        # Return delimiter with highest count
+        delimiter = max(delimiters, key=delimiters.get)
+        logger.debug(f"Detected delimiter: '{delimiter}'")
+        return delimiter
+        
+    except Exception:
+        return ','
+
+
 class CSVParser:
     """Parse and validate CSV files"""
     
@@ -35,21 +141,33 @@ class CSVParser:
             
             logger.info(f"Parsing CSV: {file_path}")
             
+            # Read the head of the file once for encoding and delimiter detection
+            head = self._read_head(file_path)
+            
             # Detect encoding
-            encoding = self._detect_encoding(file_path)
+            encoding = self._detect_encoding(head)
             
             # Detect delimiter if not provided
             delimiter = kwargs.get('delimiter') or kwargs.get('sep')
             if not delimiter:
-                delimiter = self._detect_delimiter(file_path, encoding)
+                delimiter = self._detect_delimiter(head, encoding)
             
-            # Read CSV
-            df = pd.read_csv(
-                file_path,
-                encoding=encoding,
-                sep=delimiter,
-                **{k: v for k, v in kwargs.items() if k not in ['delimiter', 'sep']}
-            )
+            # Read CSV (Arrow for plain UTF-8 files, pandas for other encodings or options)
+            df = None
+            extra_kwargs = {k: v for k, v in kwargs.items() if k not in ['delimiter', 'sep']}
+            if not extra_kwargs and encoding.lower() in ('utf-8', 'ascii'):
+                try:
+                    df = read_csv_arrow(file_path, delimiter=delimiter)
+                except pa.ArrowInvalid as e:
+                    logger.debug(f"Arrow CSV reader failed, using pandas: {e}")
+            
+            if df is None:
+                df = pd.read_csv(
+                    file_path,
+                    encoding=encoding,
+                    sep=delimiter,
+                    **extra_kwargs
+                )
             
             # Validate and analyze
             validation_results = self._validate_dataframe(df)
@@ -78,55 +196,53 @@ class CSVParser:
                 'dataframe': pd.DataFrame()
             }
     
-    def _detect_encoding(self, file_path: Path) -> str:
+    def _read_head(self, file_path: Path, size: int = 10000) -> bytes:
         """
-        Detect file encoding
+        Read the first bytes of a file for format detection
         
         Args:
             file_path: Path to file
+            size: Number of bytes to read
             
         Returns:
-            Detected encoding
+            Raw bytes from the start of the file
         """
         try:
             with open(file_path, 'rb') as f:
-                result = chardet.detect(f.read(10000))
-                encoding = result['encoding'] or 'utf-8'
-                logger.debug(f"Detected encoding: {encoding} (confidence: {result['confidence']})")
-                return encoding
+                return f.read(size)
+        except Exception:
+            return b''
+    
+    def _detect_encoding(self, head: bytes) -> str:
+        """
+        Detect file encoding
+        
+        Args:
+            head: Raw bytes from the start of the file
+            
+        Returns:
+            Detected encoding
+        """
+        try:
+            result = chardet.detect(head)
+            encoding = result['encoding'] or 'utf-8'
+            logger.debug(f"Detected encoding: {encoding} (confidence: {result['confidence']})")
+            return encoding
         except Exception:
             return 'utf-8'
     
-    def _detect_delimiter(self, file_path: Path, encoding: str) -> str:
+    def _detect_delimiter(self, head: bytes, encoding: str) -> str:
         """
         Detect CSV delimiter
         
         Args:
-            file_path: Path to file
+            head: Raw bytes from the start of the file
             encoding: File encoding
             
         Returns:
             Detected delimiter
         """
-        try:
-            with open(file_path, 'r', encoding=encoding) as f:
-                first_line = f.readline()
-                
-                # Count common delimiters
-                delimiters = {
-                    ',': first_line.count(','),
-                    ';': first_line.count(';'),
-                    '\t': first_line.count('\t'),
-                    '|': first_line.count('|')
-                }
-                
-                # Return delimiter with highest count
-                delimiter = max(delimiters, key=delimiters.get)
-                logger.debug(f"Detected delimiter: '{delimiter}'")
-                return delimiter
-                
-        except Exception:
-            return ','
+        return detect_delimiter(head, encoding)
     
     def _validate_dataframe(self, df: pd.DataFrame) -> Dict[str, Any]:
         """
@@ -153,9 +269,11 @@ class CSVParser:
         if df.empty:
             return validation
         
-        # Check for nulls
+        # Check for nulls (column by column; the counts also give the overall total)
+        total_nulls = 0
         for col in df.columns:
             null_count = df[col].isnull().sum()
+            total_nulls += null_count
             if null_count > 0:
                 null_pct = (null_count / len(df)) * 100
                 validation['columns_with_nulls'][col] = {
@@ -164,7 +282,6 @@ class CSVParser:
                 }
         
         # Total null percentage
-        total_nulls = df.isnull().sum().sum()
         total_cells = len(df) * len(df.columns)
         validation['total_null_percentage'] = round((total_nulls / total_cells * 100), 2)
         
@@ -133,6 +133,10 @@ class ReportGenerator:
             logger.error(f"Error generating report: {str(e)}")
             raise
     
+    def _count_missing(self, df: pd.DataFrame) -> int:
+        """Count missing cells column by column, without building a full boolean frame"""
+        return int(sum(df[col].isna().sum() for col in df.columns))
+    
     def _create_title_page(self, metadata: Dict[str, Any]) -> List:
         """Create report title page"""
         elements = []
@@ -195,7 +199,7 @@ class ReportGenerator:
             ['Total Variables', str(len(df.columns))],
             ['Numeric Variables', str(len(df.select_dtypes(include=['number']).columns))],
             ['Categorical Variables', str(len(df.select_dtypes(include=['object']).columns))],
-            ['Missing Values', f"{df.isnull().sum().sum():,}"],
+            ['Missing Values', f"{self._count_missing(df):,}"],
             ['Duplicate Records', f"{df.duplicated().sum():,}"]
         ]
         
@@ -264,7 +268,7 @@ class ReportGenerator:
         findings = []
         
         # Data quality finding
-        missing_pct = (df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100
+        missing_pct = (self._count_missing(df) / (len(df) * len(df.columns))) * 100
         if missing_pct < 5:
             findings.append(f"✓ <b>Data Quality:</b> Excellent - only {missing_pct:.1f}% missing values")
         elif missing_pct < 15:
@@ -300,7 +304,7 @@ class ReportGenerator:
         recommendations = []
         
         # Data quality recommendations
-        missing_pct = (df.isnull().sum().sum() / (len(df) * len(df.columns))) * 100
+        missing_pct = (self._count_missing(df) / (len(df) * len(df.columns))) * 100
         if missing_pct > 10:
             recommendations.append(
                 "1. <b>Data Quality Improvement:</b> Investigate and address missing values, "
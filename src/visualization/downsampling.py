@@ -0,0 +1,61 @@
+"""
+Downsampling Module - Shrink long chart series before they are sent to the browser
+"""
+import numpy as np
+from typing import Sequence, Tuple
+
+# Line charts longer than this are downsampled (LTTB) before being plotted
+MAX_LINE_POINTS = 2000
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices of the points Largest-Triangle-Three-Buckets keeps from an evenly spaced series
+
+    The first and last points are always kept. The points in between are split
+    into n_out - 2 buckets, and each bucket keeps the point forming the largest
+    triangle with the previously kept point and the next bucket's average.
+
+    Args:
+        y: Series values (float array longer than n_out)
+        n_out: Number of points to keep (at least 3)
+
+    Returns:
+        Strictly increasing indices into y
+    """
+    n = len(y)
+    x = np.arange(n, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[hi:next_hi].mean(), y[hi:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+def downsample_line(x: Sequence, y: Sequence, n_out: int = MAX_LINE_POINTS) -> Tuple[Sequence, Sequence]:
+    """
+    Reduce a long line series to n_out points, keeping its visual shape
+
+    Args:
+        x: X values (any type, e.g. dates as text)
+        y: Y values; series that are not numeric are returned unchanged
+        n_out: Maximum number of points to return
+
+    Returns:
+        Tuple of (x, y), unchanged when the series is short or not numeric
+    """
+    if len(y) <= n_out:
+        return x, y
+    try:
+        values = np.asarray(y, dtype=float)
+    except (TypeError, ValueError):
+        return x, y
+    keep = lttb_indices(values, n_out)
+    return np.asarray(x, dtype=object)[keep], values[keep]
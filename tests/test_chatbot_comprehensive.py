@@ -11,7 +11,8 @@ from pathlib import Path
 # Add src to path
 sys.path.append(str(Path(__file__).parent.parent))
 
-from src.conversational.openai_agent import OpenAIAnalyticsAgent
+from src.conversational.openai_agent import OpenAIAnalyticsAgent, PARTIAL_ANSWER_NOTE
+from src.conversational.smart_agent import CONVERSATION_CONTEXT_SIZE, top_value_counts
 
 class TestChatbotFunctionality:
     """Test chatbot core functionality"""
@@ -38,6 +39,92 @@ class TestChatbotFunctionality:
         assert agent.current_data is not None
         assert len(agent.current_data) > 0
     
+    def test_reload_ignores_stale_group_stats(self, agent):
+        """Test grouped results computed on a replaced frame are not reused"""
+        old = pd.DataFrame({'product': ['a', 'b'], 'revenue': [400, 200]})
+        new = pd.DataFrame({'product': ['b', 'a'], 'revenue': [500, 100]})
+        agent.openai_available = agent.ollama_available = False
+        agent.load_data(old)
+        agent.load_data(new)
+        # A background question on the old frame finishing after the reload
+        agent._group_stats(old, 'product', 'revenue')
+        answer = agent.ask("top 5 product by revenue")['answer']
+        assert answer.index('**b**: $500.00') < answer.index('**a**: $100.00')
+        print("[OK] Stale grouped results ignored")
+    
+    def test_conversation_context_is_bounded(self, agent, sample_data):
+        """Test a long-lived agent only keeps the most recent questions"""
+        agent.openai_available = agent.ollama_available = False
+        agent.load_data(sample_data)
+        agent.conversation_context.extend({'question': 'earlier'} for _ in range(CONVERSATION_CONTEXT_SIZE))
+        agent.ask("what is the total revenue?")
+        assert len(agent.conversation_context) == CONVERSATION_CONTEXT_SIZE
+        assert agent.conversation_context[-1]['question'] == "what is the total revenue?"
+        print("[OK] Conversation context bounded")
+    
+    def test_ask_stream(self, agent, sample_data):
+        """Test streamed fallback answers end with the same response as ask()"""
+        agent.openai_available = agent.ollama_available = False
+        agent.load_data(sample_data)
+        items = list(agent.ask_stream("Show me the top 5 items"))
+        response = items[-1]
+        assert isinstance(response, dict)
+        assert response['source'] == 'fallback'
+        assert "".join(items[:-1]) == response['answer']
+        assert response['answer'] == agent.ask("Show me the top 5 items")['answer']
+        print("[OK] Streamed answer matches")
+    
+    def test_ask_stream_from_provider(self, agent, sample_data, monkeypatch):
+        """Test an LLM answer is streamed chunk by chunk and returned with its source"""
+        agent.load_data(sample_data)
+        chunks = ["Top ", "products ", "are listed."]
+        monkeypatch.setattr(agent, '_llm_providers', lambda: [("ollama", 0.85, lambda prompt: iter(chunks))])
+        items = list(agent.ask_stream("Show me the top 5 products"))
+        assert items[:-1] == chunks
+        response = items[-1]
+        assert response['answer'] == "Top products are listed."
+        assert response['source'] == 'ollama'
+        assert response['confidence'] == 0.85
+        assert agent.ask("Show me the top 5 products") == response
+        print("[OK] Provider answer streamed")
+    
+    def test_ask_stream_cut_off(self, agent, sample_data, monkeypatch):
+        """Test a stream that breaks off mid-answer is kept but flagged with lower confidence"""
+        agent.load_data(sample_data)
+        
+        def broken_stream(prompt):
+            yield "Top products "
+            raise ConnectionError("stream closed")
+        
+        monkeypatch.setattr(agent, '_llm_providers', lambda: [("openai", 0.9, broken_stream)])
+        items = list(agent.ask_stream("Show me the top 5 products"))
+        response = items[-1]
+        assert items[:-1] == ["Top products ", PARTIAL_ANSWER_NOTE]
+        assert response['answer'] == "Top products" + PARTIAL_ANSWER_NOTE
+        assert response['confidence'] < 0.9
+        assert response['source'] == 'openai'
+        print("[OK] Cut-off answer flagged")
+
+    def test_ask_falls_back_after_cut_off(self, agent, sample_data, monkeypatch):
+        """Test ask() moves on to the next option when a stream breaks off mid-answer"""
+        agent.load_data(sample_data)
+
+        def broken_stream(prompt):
+            yield "Top products "
+            raise ConnectionError("stream closed")
+
+        providers = [("openai", 0.9, broken_stream), ("ollama", 0.85, lambda prompt: iter(["Full answer"]))]
+        monkeypatch.setattr(agent, '_llm_providers', lambda: providers)
+        response = agent.ask("Show me the top 5 products")
+        assert response['answer'] == "Full answer"
+        assert response['source'] == 'ollama'
+
+        monkeypatch.setattr(agent, '_llm_providers', lambda: providers[:1])
+        response = agent.ask("Show me the top 5 products")
+        assert PARTIAL_ANSWER_NOTE not in response['answer']
+        assert response['source'] == 'fallback'
+        print("[OK] ask() falls back after a cut-off stream")
+
     def test_basic_questions(self, agent, sample_data):
         """Test basic question answering"""
         agent.load_data(sample_data)
@@ -176,6 +263,25 @@ class TestChartTypes:
             print("[OK] Chart data format is correct")
 
 
+class TestHelpers:
+    """Test module-level agent helpers"""
+    
+    def test_top_value_counts(self):
+        """Test top values match pandas value_counts, ties in first-seen order"""
+        values = pd.Series(['b', 'a', None, 'c', 'a', 'b', 'd', 'a'])
+        expected = values.value_counts().head(3)
+        assert top_value_counts(values, 3) == (expected.index.tolist(), expected.tolist())
+        assert top_value_counts(values, 3) == (['a', 'b', 'c'], [3, 2, 1])
+        print("[OK] Top values counted correctly")
+    
+    def test_top_value_counts_without_pyarrow(self, monkeypatch):
+        """Test top values are still counted when pyarrow is not installed"""
+        monkeypatch.setitem(sys.modules, 'pyarrow', None)
+        values = pd.Series(['b', 'a', None, 'c', 'a', 'b', 'd', 'a'])
+        assert top_value_counts(values, 3) == (['a', 'b', 'c'], [3, 2, 1])
+        print("[OK] Top values counted with pandas")
+
+
 class TestDataTypes:
     """Test with different data types"""
     
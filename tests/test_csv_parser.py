@@ -0,0 +1,85 @@
+"""
+Tests for CSV ingestion
+"""
+import io
+import sys
+import pytest
+import pandas as pd
+import pyarrow as pa
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data_ingestion.csv_parser import CSVParser, read_csv_arrow
+
+SAMPLE_FILES = [
+    'data/sample/retail_demo.csv',
+    'data/sample/ecommerce_demo.csv',
+    'data/sample/customer_records.csv',
+]
+
+
+class TestArrowReader:
+    """Test the Arrow-backed CSV reader"""
+
+    @pytest.mark.parametrize("path", SAMPLE_FILES)
+    def test_matches_pandas(self, path):
+        """Test Arrow parsing yields the same frame as pd.read_csv"""
+        expected = pd.read_csv(path)
+        assert read_csv_arrow(path).equals(expected)
+        assert read_csv_arrow(Path(path).read_bytes()).equals(expected)
+
+    def test_missing_text_cells_are_nan(self):
+        """Test blank, quoted-blank and NA-style cells become NaN like pd.read_csv"""
+        raw = (b'region,sales,note,empty\n'
+               b'North,10,x,\n'
+               b',60,"",\n'
+               b'South,20,N/A,\n'
+               b'"",30,null,\n'
+               b'NA,5,y,\n')
+        df = read_csv_arrow(raw)
+        assert df.equals(pd.read_csv(io.BytesIO(raw)))
+        assert df['region'].isna().sum() == 3
+        assert df.groupby('region')['sales'].sum().to_dict() == {'North': 10, 'South': 20}
+
+    @pytest.mark.parametrize("raw", [
+        b"a,a\n1,2\n",
+        b"id\n1\n99999999999999999999\n",
+        "name,value\ncaf\xe9,1\n".encode('latin-1'),
+    ])
+    def test_rejects_what_pandas_reads_differently(self, raw):
+        """Test repeated headers, non-UTF-8 text and integers past int64 are left to pd.read_csv"""
+        with pytest.raises(pa.ArrowInvalid):
+            read_csv_arrow(raw)
+
+    def test_dates_stay_text(self):
+        """Test inferred date columns are returned as strings"""
+        df = read_csv_arrow(b"date,value\n2024-01-15,1\n2024-01-16,2\n")
+        assert df['date'].tolist() == ['2024-01-15', '2024-01-16']
+
+    def test_parser_uses_detected_delimiter(self, tmp_path):
+        """Test CSVParser still honours the detected delimiter"""
+        path = tmp_path / "semicolon.csv"
+        path.write_text("a;b\n1;2\n3;4\n")
+        result = CSVParser().parse_csv(str(path))
+        assert result['status'] == 'success'
+        assert result['delimiter'] == ';'
+        assert result['dataframe']['b'].tolist() == [2, 4]
+
+    def test_parser_reports_blank_cells(self, tmp_path):
+        """Test CSVParser counts blank text cells as nulls"""
+        path = tmp_path / "blanks.csv"
+        path.write_text("region,sales\nNorth,10\n,20\nNA,30\n")
+        result = CSVParser().parse_csv(str(path))
+        assert result['status'] == 'success'
+        assert result['validation']['columns_with_nulls']['region']['count'] == 2
+    
+    def test_parser_rejects_late_non_utf8_row(self, tmp_path):
+        """Test a non-UTF-8 row past the encoding-detection window still fails as with pandas"""
+        path = tmp_path / "late_latin1.csv"
+        path.write_bytes(b"name,value\n" + b"plain,1\n" * 2000 + "caf\xe9,2\n".encode('latin-1'))
+        assert path.stat().st_size > 10000
+        result = CSVParser().parse_csv(str(path))
+        assert result['status'] == 'error'
+        assert result['dataframe'].empty
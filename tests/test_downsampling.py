@@ -0,0 +1,53 @@
+"""
+Tests for chart downsampling
+"""
+import sys
+import numpy as np
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.visualization.downsampling import MAX_LINE_POINTS, downsample_line, lttb_indices
+
+
+class TestLTTB:
+    """Test Largest-Triangle-Three-Buckets point selection"""
+
+    def test_output_shape(self):
+        """Test n_out strictly increasing indices including both endpoints"""
+        y = np.sin(np.linspace(0, 20, 5000))
+        keep = lttb_indices(y, 300)
+        assert len(keep) == 300
+        assert (np.diff(keep) > 0).all()
+        assert keep[0] == 0 and keep[-1] == len(y) - 1
+
+    def test_spike_survives(self):
+        """Test an isolated spike is kept"""
+        y = np.zeros(10000)
+        y[4321] = 100.0
+        assert 4321 in lttb_indices(y, 100)
+
+
+class TestDownsampleLine:
+    """Test line series downsampling"""
+
+    def test_long_series_is_reduced(self):
+        """Test long numeric series are cut to MAX_LINE_POINTS"""
+        x = tuple(f"day {i}" for i in range(5000))
+        y = tuple(float(i % 7) for i in range(5000))
+        new_x, new_y = downsample_line(x, y)
+        assert len(new_x) == len(new_y) == MAX_LINE_POINTS
+        assert new_x[0] == x[0] and new_x[-1] == x[-1]
+
+    def test_short_series_unchanged(self):
+        """Test series within the limit are returned as-is"""
+        x, y = (1, 2, 3), (4, 5, 6)
+        assert downsample_line(x, y) == (x, y)
+
+    def test_non_numeric_unchanged(self):
+        """Test series whose values are not numeric are returned as-is"""
+        x = tuple(range(5000))
+        y = tuple(f"v{i}" for i in range(5000))
+        new_x, new_y = downsample_line(x, y)
+        assert new_x is x and new_y is y